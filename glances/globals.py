@@ -23,6 +23,7 @@ import queue
 import re
 import subprocess
 import sys
+import time
 import weakref
 from configparser import ConfigParser, NoOptionError, NoSectionError
 from datetime import datetime
@@ -457,6 +458,30 @@ def weak_lru_cache(maxsize=128, typed=False):
     return wrapper
 
 
+def ttl_cache(ttl=30):
+    """Cache decorator: the result is kept during ttl seconds (one entry per positional arguments).
+
+    Use it for slow values that change at a lower rate than the Glances refresh."""
+
+    def wrapper(func):
+        cache = {}
+
+        @functools.wraps(func)
+        def inner(*args):
+            now = time.monotonic()
+            hit = cache.get(args)
+            if hit is not None and now < hit[0]:
+                return hit[1]
+            ret = func(*args)
+            cache[args] = (now + ttl, ret)
+            return ret
+
+        inner.cache_clear = cache.clear
+        return inner
+
+    return wrapper
+
+
 def namedtuple_to_dict(data):
     """Convert a namedtuple to a dict, using the _asdict() method embedded in PsUtil stats."""
     return {k: (v._asdict() if hasattr(v, '_asdict') else v) for k, v in data.items()}
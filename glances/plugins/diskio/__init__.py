@@ -8,37 +8,73 @@
 
 """Disk I/O plugin."""
 
+import logging
+import operator
+from collections import namedtuple
+
 import psutil
-import time
-from glances.globals import nativestr
+
+from glances.globals import LINUX, WINDOWS, file_exists, nativestr
 from glances.logger import logger
-from glances.plugins.plugin.model import GlancesPluginModel
-from glances.plugins.nvme_detection import NVMeDetection
-from glances.plugins.nvme_detection import get_nvme_health_metrics
 from glances.plugins.nvme_detection import NVMeDetection, get_nvme_health_metrics
 from glances.plugins.nvme_metrics import NVMeMetrics
+from glances.plugins.plugin.model import GlancesPluginModel
 
 
+def _get_nvme_logger():
+    """Return the NVMe detection logger (writing to nvme.log).
 
+    The file handler is only created on first use, so importing the plugin has no side effect.
+    """
+    nvme_logger = logging.getLogger("nvme_logger")
+    if not nvme_logger.handlers:
+        nvme_logger.setLevel(logging.INFO)
+        # Do not also send the records to the Glances root logger
+        nvme_logger.propagate = False
+        file_handler = logging.FileHandler("nvme.log")
+        file_handler.setLevel(logging.INFO)
+        file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        nvme_logger.addHandler(file_handler)
+    return nvme_logger
 
 
-import logging
+# On Linux, the disk I/O counters are directly streamed from the /proc/diskstats file
+# (psutil reads the whole file at once and computes fields we do not use)
+DISKSTATS_FILE = '/proc/diskstats'
+diskstats_file_exists = LINUX and file_exists(DISKSTATS_FILE)
+# /proc/diskstats counts 512 bytes sectors, whatever the real sector size of the device
+DISKSTATS_SECTOR_SIZE = 512
 
-# Configure a separate logger for NVMe detection
-nvme_logger = logging.getLogger("nvme_logger")
-nvme_logger.setLevel(logging.INFO)
+# Subset of the psutil.disk_io_counters() namedtuple used by the plugin
+DiskIOCounters = namedtuple('DiskIOCounters', ['read_count', 'write_count', 'read_bytes', 'write_bytes'])
 
-# Create a file handler for the NVMe log file
-nvme_log_file = "nvme.log"
-file_handler = logging.FileHandler(nvme_log_file)
-file_handler.setLevel(logging.INFO)
 
-# Create a formatter and add it to the handler
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(formatter)
+def _read_proc_diskstats(filename=DISKSTATS_FILE):
+    """Yield (disk_name, DiskIOCounters) tuples read from the /proc/diskstats file.
+
+    As psutil.disk_io_counters(perdisk=True), partitions are also returned.
+    """
+    with open(filename, 'rb') as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) >= 14:
+                # major minor name reads reads_merged rsectors rtime writes writes_merged wsectors ...
+                reads, rsectors, writes, wsectors = fields[3], fields[5], fields[7], fields[9]
+            elif len(fields) == 7:
+                # Partitions on old kernels (< 2.6.25): major minor name reads rsectors writes wsectors
+                reads, rsectors, writes, wsectors = fields[3:7]
+            else:
+                continue
+            yield (
+                nativestr(fields[2]),
+                DiskIOCounters(
+                    int(reads),
+                    int(writes),
+                    int(rsectors) * DISKSTATS_SECTOR_SIZE,
+                    int(wsectors) * DISKSTATS_SECTOR_SIZE,
+                ),
+            )
 
-# Add the handler to the logger
-nvme_logger.addHandler(file_handler)
 
 # Fields description
 # description: human readable description
@@ -111,8 +147,22 @@ class PluginModel(GlancesPluginModel):
             fields_description=fields_description,
         )
 
-        # Initialize NVMeDetection
-        self.nvme_detector = NVMeDetection()
+        # Initialize NVMeDetection (WMI is only available on Windows)
+        self.nvme_detector = NVMeDetection() if WINDOWS else None
+        # Keep a single NVMeMetrics instance (it stores the previous counters to compute the speeds)
+        self._nvme_metrics = NVMeMetrics()
+        # Last NVMe drives list, used to only log the changes
+        self._previous_nvme_drives = None
+
+        # Last raw /proc/diskstats counters and wrap offsets per disk (see _nowrap)
+        self._diskio_last = {}
+        self._diskio_offsets = {}
+
+        # Alert headers (rx, tx) per disk name, built once
+        self._alert_headers = {}
+
+        # Cache of the is_display() result per disk name (reset when the configuration is loaded)
+        self._display_cache = {}
 
         # We want to display the stat in the curse interface
         self.display_curse = True
@@ -132,6 +182,30 @@ class PluginModel(GlancesPluginModel):
         """Return the key of the list."""
         return 'disk_name'
 
+    def load_limits(self, config):
+        """Load the limits and reset the is_display() cache (it depends on the show/hide options)."""
+        self._display_cache = {}
+        return super().load_limits(config)
+
+    def _nowrap(self, diskio):
+        """Compensate the wrap/reset of the /proc/diskstats counters.
+
+        Same algorithm as psutil.disk_io_counters(nowrap=True): when a counter
+        decreases, its previous value is added to the following ones.
+        """
+        for disk_name, counters in diskio.items():
+            last = self._diskio_last.get(disk_name)
+            self._diskio_last[disk_name] = counters
+            offsets = self._diskio_offsets.get(disk_name)
+            if last is not None and any(map(operator.lt, counters, last)):
+                offsets = tuple(
+                    o + (lv if cv < lv else 0) for cv, lv, o in zip(counters, last, offsets or (0, 0, 0, 0))
+                )
+                self._diskio_offsets[disk_name] = offsets
+            if offsets is not None:
+                diskio[disk_name] = DiskIOCounters._make(map(operator.add, counters, offsets))
+        return diskio
+
     @GlancesPluginModel._check_decorator
     @GlancesPluginModel._log_result_decorator
     def update(self):
@@ -147,32 +221,32 @@ class PluginModel(GlancesPluginModel):
 
         return self.stats
 
-    @GlancesPluginModel._manage_rate
-    def update_local(self):
-        stats = self.get_init_value()
-
-        try:
-            # Get disk I/O stats for all drives
-            diskio = psutil.disk_io_counters(perdisk=True)
-        except Exception:
-            return stats
+    def _nvme_stats(self, diskio, key):
+        """Return the stats of the NVMe drives (diskio is the perdisk I/O counters dict)."""
+        # Reuse the NVMeDetection instance (keep the drives cache between refreshes)
+        nvme_drives = self.nvme_detector.list_nvme_drives(diskio)
+        if self._previous_nvme_drives != nvme_drives:
+            if nvme_drives:
+                _get_nvme_logger().info(f"NVMe drives detected: {', '.join(d['Model'] for d in nvme_drives)}")
+            else:
+                _get_nvme_logger().info("No NVMe drives detected.")
+            self._previous_nvme_drives = list(nvme_drives)
 
-        # Initialize NVMeDetection
-        nvme_detector = NVMeDetection()
-        nvme_drives = nvme_detector.list_nvme_drives()
+        # SMART health and temperature of all the NVMe drives (batched WMI queries)
+        health = get_nvme_health_metrics(tuple(d["PNPDeviceID"] for d in nvme_drives))
 
-        # Add NVMe drives to stats with detailed metrics
+        stats = []
         for nvme_drive in nvme_drives:
             # Retrieve I/O metrics for the NVMe drive
-            io_metrics = NVMeMetrics().get_disk_io_metrics(nvme_drive["DeviceID"])
+            io_metrics = self._nvme_metrics.get_disk_io_metrics(nvme_drive["DiskName"], diskio)
 
-            # Retrieve health and temperature metrics for the NVMe drive
-            health_metrics = get_nvme_health_metrics(nvme_drive["DeviceID"])
+            health_metrics = health.get(nvme_drive["PNPDeviceID"])
 
             # Append NVMe stats
             stat = {
-                'key': self.get_key(),
-                'disk_name': nvme_drive['Model'],
+                'key': key,
+                # Several drives can have the same model: add the (unique) psutil disk name
+                'disk_name': f"{nvme_drive['Model']} ({nvme_drive['DiskName']})",
                 'read_speed': io_metrics.get("read_speed", 0) if io_metrics else 0,  # Bytes/sec
                 'write_speed': io_metrics.get("write_speed", 0) if io_metrics else 0,  # Bytes/sec
                 'read_count': io_metrics.get("read_count", 0) if io_metrics else 0,
@@ -180,37 +254,72 @@ class PluginModel(GlancesPluginModel):
                 'read_bytes': 0,  # Default value for read_bytes
                 'write_bytes': 0,  # Default value for write_bytes
                 'health_status': health_metrics.get("health_status", "Unknown") if health_metrics else "Unknown",
-                'temperature': health_metrics.get("temperature", None) if health_metrics else None,  # Temperature in Celsius
+                # Temperature in Celsius
+                'temperature': health_metrics.get("temperature", None) if health_metrics else None,
             }
             stats.append(stat)
 
+        return stats
+
+    @GlancesPluginModel._manage_rate
+    def update_local(self):
+        stats = self.get_init_value()
+
+        try:
+            # Get disk I/O stats for all drives
+            if diskstats_file_exists:
+                diskio = self._nowrap(dict(_read_proc_diskstats()))
+            else:
+                # nowrap: psutil compensates the counters wrap/reset
+                diskio = psutil.disk_io_counters(perdisk=True, nowrap=True)
+        except Exception:
+            return stats
+
+        key = self.get_key()
+
+        # Add NVMe drives to stats with detailed metrics (Windows only)
+        if self.nvme_detector is not None:
+            try:
+                stats.extend(self._nvme_stats(diskio, key))
+            except Exception as e:
+                # Do not lose the regular disks stats
+                logger.debug(f"Can not grab NVMe drives stats ({e})")
+            if not self.nvme_detector.available:
+                # WMI modules not installed: do not try again
+                self.nvme_detector = None
+
         # Add regular disks to stats
         for disk_name, disk_stat in diskio.items():
             # Skip RAM disks if configured to do so
             if self.args is not None and not self.args.diskio_show_ramfs and disk_name.startswith('ram'):
                 continue
             # Check if the disk should be displayed
-            if not self.is_display(disk_name):
+            display = self._display_cache.get(disk_name)
+            if display is None:
+                display = self._display_cache[disk_name] = self.is_display(disk_name)
+            if not display:
                 continue
 
-            # Filter stats for regular disks
-            stat = self.filter_stats(disk_stat)
-            stat['key'] = self.get_key()
-            stat['disk_name'] = disk_name
-
-            # Initialize default NVMe-related fields for regular disks
-            stat['read_speed'] = 0  # Default value for read speed
-            stat['write_speed'] = 0  # Default value for write speed
-            stat['health_status'] = "N/A"  # Default health status
-            stat['temperature'] = None  # Default temperature
-            stat['read_bytes'] = stat.get('read_bytes', 0)  # Ensure read_bytes is initialized
-            stat['write_bytes'] = stat.get('write_bytes', 0)  # Ensure write_bytes is initialized
-
-            stats.append(stat)
+            # Build the stat in one go from the psutil namedtuple
+            # (no _asdict() + filter + per field update)
+            stats.append(
+                {
+                    'key': key,
+                    'disk_name': disk_name,
+                    'read_count': disk_stat.read_count,
+                    'write_count': disk_stat.write_count,
+                    'read_bytes': disk_stat.read_bytes,
+                    'write_bytes': disk_stat.write_bytes,
+                    # Default NVMe-related fields for regular disks
+                    'read_speed': 0,
+                    'write_speed': 0,
+                    'health_status': "N/A",
+                    'temperature': None,
+                }
+            )
 
         return stats
 
-    
     def update_views(self):
         """Update stats views."""
         # Call the father's method
@@ -218,14 +327,17 @@ class PluginModel(GlancesPluginModel):
 
         # Add specifics information
         # Alert
+        key = self.get_key()
+        views = self.views
+        alert_headers = self._alert_headers
         for i in self.get_raw():
             disk_real_name = i['disk_name']
-            self.views[i[self.get_key()]]['read_bytes']['decoration'] = self.get_alert(
-                i['read_bytes'], header=disk_real_name + '_rx'
-            )
-            self.views[i[self.get_key()]]['write_bytes']['decoration'] = self.get_alert(
-                i['write_bytes'], header=disk_real_name + '_tx'
-            )
+            headers = alert_headers.get(disk_real_name)
+            if headers is None:
+                headers = alert_headers[disk_real_name] = (f'{disk_real_name}_rx', f'{disk_real_name}_tx')
+            item_views = views[i[key]]
+            item_views['read_bytes']['decoration'] = self.get_alert(i['read_bytes'], header=headers[0])
+            item_views['write_bytes']['decoration'] = self.get_alert(i['write_bytes'], header=headers[1])
 
     def msg_curse(self, args=None, max_width=None):
         """Return the dict to display in the curse interface."""
@@ -244,22 +356,32 @@ class PluginModel(GlancesPluginModel):
             logger.debug(f"No max_width defined for the {self.plugin_name} plugin, it will not be displayed.")
             return ret
 
+        # Bind the formatters once (the format specs are not parsed again for each disk)
+        fmt8 = '{:>8}'.format
+        fmt7 = '{:>7}'.format
+        fmt10 = '{:>10}'.format
+        fmt12 = '{:>12}'.format
+        name_fmt = f'{{:{name_max_width + 1}}}'.format
+
         # Header
         msg = '{:{width}}'.format('DISK I/O', width=name_max_width)
         ret.append(self.curse_add_line(msg, "TITLE"))
-        msg = '{:>8}'.format('R/s')
-        ret.append(self.curse_add_line(msg))
-        msg = '{:>7}'.format('W/s')
-        ret.append(self.curse_add_line(msg))
-        msg = '{:>10}'.format('Temp')
-        ret.append(self.curse_add_line(msg))
-        msg = '{:>12}'.format('Health')
-        ret.append(self.curse_add_line(msg))
+        ret.append(self.curse_add_line(fmt8('R/s')))
+        ret.append(self.curse_add_line(fmt7('W/s')))
+        ret.append(self.curse_add_line(fmt10('Temp')))
+        ret.append(self.curse_add_line(fmt12('Health')))
+
+        # Hoist the constant lookups out of the disk loop
+        key = self.get_key()
+        views = self.views
+        auto_unit = self.auto_unit
+        hidden_keys = self.hide_zero_fields
 
         # Disk list (sorted by name)
         for i in self.sorted_stats():
             # Hide stats if never different from 0 (issue #1787)
-            if all(self.get_views(item=i[self.get_key()], key=f, option='hidden') for f in self.hide_zero_fields):
+            item_views = views[i[key]]
+            if all(item_views.get(f, {}).get('hidden', True) for f in hidden_keys):
                 continue
             # Is there an alias for the disk name?
             disk_name = i['alias'] if 'alias' in i else i['disk_name']
@@ -268,64 +390,18 @@ class PluginModel(GlancesPluginModel):
             if len(disk_name) > name_max_width:
                 # Cut disk name if it is too long
                 disk_name = disk_name[:name_max_width] + '_'
-            msg = '{:{width}}'.format(nativestr(disk_name), width=name_max_width + 1)
-            ret.append(self.curse_add_line(msg))
+            ret.append(self.curse_add_line(name_fmt(nativestr(disk_name))))
 
             # Add NVMe metrics
-            read_speed = self.auto_unit(i.get('read_speed', None))
-            write_speed = self.auto_unit(i.get('write_speed', None))
+            read_speed = auto_unit(i.get('read_speed', None))
+            write_speed = auto_unit(i.get('write_speed', None))
             temperature = f"{i.get('temperature', 'N/A')}°C" if i.get('temperature') else "N/A"
             health_status = i.get('health_status', "Unknown")
 
             # Add metrics to the UI
-            msg = '{:>8}'.format(read_speed)
-            ret.append(self.curse_add_line(msg))
-            msg = '{:>7}'.format(write_speed)
-            ret.append(self.curse_add_line(msg))
-            msg = '{:>10}'.format(temperature)
-            ret.append(self.curse_add_line(msg))
-            msg = '{:>12}'.format(health_status)
-            ret.append(self.curse_add_line(msg))
+            ret.append(self.curse_add_line(fmt8(read_speed)))
+            ret.append(self.curse_add_line(fmt7(write_speed)))
+            ret.append(self.curse_add_line(fmt10(temperature)))
+            ret.append(self.curse_add_line(fmt12(health_status)))
 
         return ret
-
-        
-class NVMeMetrics:
-    def __init__(self):
-        self.last_disk_stats = {}
-        self.last_update_time = time.time()
-
-    def get_disk_io_metrics(self, device_id):
-        try:
-            # Use psutil to fetch disk I/O counters
-            diskio = psutil.disk_io_counters(perdisk=True)
-            if device_id not in diskio:
-                return None
-
-            current_stats = diskio[device_id]
-            current_time = time.time()
-
-            # Calculate read/write speeds
-            if device_id in self.last_disk_stats:
-                last_stats = self.last_disk_stats[device_id]
-                elapsed_time = current_time - self.last_update_time
-                read_speed = (current_stats.read_bytes - last_stats.read_bytes) / elapsed_time
-                write_speed = (current_stats.write_bytes - last_stats.write_bytes) / elapsed_time
-            else:
-                # Initialize values
-                read_speed = 0
-                write_speed = 0
-
-            # Update stats
-            self.last_disk_stats[device_id] = current_stats
-            self.last_update_time = current_time
-
-            return {
-                "read_speed": read_speed,  # Bytes/sec
-                "write_speed": write_speed,  # Bytes/sec
-                "read_count": current_stats.read_count,
-                "write_count": current_stats.write_count,
-            }
-        except Exception as e:
-            print(f"Error retrieving disk I/O metrics: {e}")
-            return None
\ No newline at end of file
@@ -1,52 +1,172 @@
-import wmi
+import threading
+import time
+
+from glances.globals import WINDOWS, ttl_cache
+from glances.logger import logger
+
+# WMI is Windows only: the module is imported on first use (see NVMeDetection.get_wmi)
+wmi = None
+
+# Bytes per GiB
+_GIB = 1 << 30
+
+# SMART attribute holding the drive temperature (Celsius in the first raw byte)
+SMART_TEMPERATURE_ID = 194
+
 
 class NVMeDetection:
+    # WMI connections per thread and namespace (COM init and namespace enumeration are expensive).
+    # COM must be initialized in each thread and its objects are bound to the creating thread
+    # (the stats can be updated from several threads, ex: webserver mode).
+    _local = threading.local()
+    # Errors raised by the WMI queries (wmi.x_wmi and pywintypes.com_error are added once the modules are imported)
+    errors = (ImportError, OSError, ValueError)
+
     def __init__(self):
         self.nvme_drives = []
+        # The NVMe topology rarely changes: only rescan every _cache_ttl seconds (or when a new disk appears)
+        self._cache_ts = 0.0
+        self._cache_ttl = 60.0
+        # Disk names (psutil perdisk keys) already seen by the last WMI scan
+        self._known_ids = set()
+        # Set to False if the WMI modules are not installed (the detection is then disabled)
+        self.available = True
+
+    @classmethod
+    def get_wmi(cls, namespace=None):
+        """Return the WMI connection of the current thread to namespace (default: root/cimv2).
+
+        The connection is created on first use in the thread.
+        """
+        global wmi
+        connections = getattr(cls._local, 'connections', None)
+        if connections is None:
+            if wmi is None:
+                import pywintypes
+                import wmi as wmi_module
+
+                wmi = wmi_module
+                # com_error: raised by pythoncom (ex: CoInitialize with RPC_E_CHANGED_MODE)
+                cls.errors = (wmi.x_wmi, pywintypes.com_error) + cls.errors
+            import pythoncom
+
+            pythoncom.CoInitialize()
+            connections = cls._local.connections = {}
+        if namespace not in connections:
+            connections[namespace] = wmi.WMI(namespace=namespace) if namespace else wmi.WMI()
+        return connections[namespace]
 
     def detect_nvme_drives(self):
+        """Scan the NVMe drives with WMI and return the list (None on error)."""
+        if not WINDOWS:
+            return []
+        nvme_drives = []
         try:
-            # Initialize WMI interface
-            c = wmi.WMI()
+            # Get the WMI interface
+            c = NVMeDetection.get_wmi()
 
             # Query all disk drives
             for disk in c.Win32_DiskDrive():
-                # Match NVMe drives based on known model names or other properties
-                if "Samsung SSD 990 PRO" in disk.Model:  # Adjust to match your drive
-                    self.nvme_drives.append({
-                        "DeviceID": disk.DeviceID,
-                        "Model": disk.Model,
-                        "Size": round(int(disk.Size) / (1024**3), 2),  # Convert size to GB
-                    })
+                # NVMe drives are exposed through the SCSI miniport with a VEN_NVME PnP ID
+                if disk.InterfaceType == 'SCSI' and 'NVME' in (disk.PNPDeviceID or '').upper():
+                    nvme_drives.append(
+                        {
+                            "DeviceID": disk.DeviceID,
+                            # Used to match the SMART data of the root/wmi namespace
+                            "PNPDeviceID": disk.PNPDeviceID,
+                            # Name used by psutil.disk_io_counters(perdisk=True)
+                            "DiskName": f"PhysicalDrive{disk.Index}",
+                            "Model": disk.Model,
+                            # Convert size to GB (Size is a string and can be None)
+                            "Size": round(int(disk.Size) / _GIB, 2) if disk.Size else None,
+                        }
+                    )
+        except ImportError as e:
+            logger.warning(f"Missing Python Lib ({e}), NVMe drives detection is disabled")
+            self.available = False
+            return None
+        except NVMeDetection.errors as e:
+            logger.debug(f"Error detecting NVMe drives: {e}")
+            return None
+        return nvme_drives
 
-            return self.nvme_drives
-        except Exception as e:
-            print(f"Error detecting NVMe drives: {e}")
-            return []
+    def list_nvme_drives(self, disk_names):
+        """Return the list of NVMe drives.
 
-    def list_nvme_drives(self):
-        if not self.nvme_drives:
-            self.detect_nvme_drives()
+        disk_names is an iterable of the disk names returned by psutil. WMI is only
+        queried when a new disk appears or when the cache TTL is over. A failed scan
+        keeps the previous list and is retried after the TTL (or when a new disk appears).
+        """
+        if (
+            self._cache_ts
+            and time.monotonic() - self._cache_ts < self._cache_ttl
+            and self._known_ids.issuperset(disk_names)
+        ):
+            return self.nvme_drives
+        nvme_drives = self.detect_nvme_drives()
+        if nvme_drives is not None:
+            self.nvme_drives = nvme_drives
+        self._known_ids = set(disk_names)
+        self._cache_ts = time.monotonic()
         return self.nvme_drives
 
-def get_nvme_health_metrics(device_id):
-    import wmi
-    c = wmi.WMI()
+
+def _match_pnp_device_id(instance_name, pnp_device_ids):
+    """Return the PNPDeviceID matching a root/wmi InstanceName (PNPDeviceID + '_N'), else None."""
+    # Drop the '_N' suffix: a bare prefix match would map ...&0&10_0 to ...&0&1
+    instance_name = instance_name.upper().rpartition('_')[0]
+    for pnp_device_id in pnp_device_ids:
+        if instance_name == pnp_device_id.upper():
+            return pnp_device_id
+    return None
+
+
+def smart_temperature(vendor_specific):
+    """Return the temperature (Celsius) read in a SMART attributes table, else None.
+
+    vendor_specific is the MSStorageDriver_ATAPISmartData.VendorSpecific bytes list:
+    2 bytes of revision, then 30 attributes of 12 bytes (id, flags (2), value, worst, raw (6), reserved).
+    """
+    for offset in range(2, min(len(vendor_specific) - 11, 2 + 30 * 12), 12):
+        if vendor_specific[offset] == SMART_TEMPERATURE_ID:
+            return vendor_specific[offset + 5]
+    return None
+
+
+# Health status and temperature change slowly: query WMI at most every 30 seconds
+@ttl_cache(ttl=30)
+def get_nvme_health_metrics(pnp_device_ids):
+    """Return a dict {pnp_device_id: {"health_status": ..., "temperature": ...}}.
+
+    pnp_device_ids is a tuple of Win32_DiskDrive PNPDeviceID. The SMART failure prediction
+    and attributes are read from the root/wmi namespace, with one query per class for all the drives.
+    Drives without SMART data are reported with an "Unknown" health status and no temperature.
+    """
+    ret = {pnp_device_id: {"health_status": "Unknown", "temperature": None} for pnp_device_id in pnp_device_ids}
+    if not pnp_device_ids:
+        return ret
+
+    try:
+        c = NVMeDetection.get_wmi(namespace='root\\wmi')
+        for status in c.MSStorageDriver_FailurePredictStatus():
+            pnp_device_id = _match_pnp_device_id(status.InstanceName, pnp_device_ids)
+            if pnp_device_id is not None:
+                ret[pnp_device_id]["health_status"] = "Failing" if status.PredictFailure else "Healthy"
+    except NVMeDetection.errors as e:
+        logger.debug(f"Error retrieving NVMe health status: {e}")
+        return ret
 
     try:
-        for disk in c.Win32_DiskDrive():
-            if disk.DeviceID == device_id:
-                # Placeholder health status and temperature
-                health_status = "Healthy"  # Use vendor-specific tools for more detail
-                temperature = None  # Actual temperature query may require external tools
-
-                return {
-                    "health_status": health_status,
-                    "temperature": temperature
-                }
-    except Exception as e:
-        print(f"Error retrieving NVMe health metrics: {e}")
-        return None
+        # Not supported by all the drivers (it only gives the status above)
+        for data in c.MSStorageDriver_ATAPISmartData():
+            pnp_device_id = _match_pnp_device_id(data.InstanceName, pnp_device_ids)
+            if pnp_device_id is not None and data.VendorSpecific:
+                ret[pnp_device_id]["temperature"] = smart_temperature(data.VendorSpecific)
+    except NVMeDetection.errors as e:
+        logger.debug(f"Error retrieving NVMe temperature: {e}")
+
+    return ret
+
 
 # Example usage for testing
 if __name__ == "__main__":
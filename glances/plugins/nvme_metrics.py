@@ -1,40 +1,47 @@
-import psutil
 import time
 
+from glances.logger import logger
+
+
 class NVMeMetrics:
     def __init__(self):
         self.last_disk_stats = {}
-        self.last_update_time = time.time()
+        # Last update time per device (devices are not always refreshed together)
+        self.last_update_time = {}
 
-    def get_disk_io_metrics(self, device_id):
+    def get_disk_io_metrics(self, device_id, diskio):
         try:
-            diskio = psutil.disk_io_counters(perdisk=True)
+            # diskio is the psutil.disk_io_counters(perdisk=True) dict already grabbed by the caller
             if device_id not in diskio:
                 return None
 
             current_stats = diskio[device_id]
-            current_time = time.time()
+            # Monotonic clock: never goes backward on NTP/wall clock corrections
+            current_time = time.monotonic()
 
             # Calculate read/write speeds
-            if device_id in self.last_disk_stats:
+            last_ts = self.last_update_time.get(device_id)
+            if last_ts is not None and device_id in self.last_disk_stats:
                 last_stats = self.last_disk_stats[device_id]
-                elapsed_time = current_time - self.last_update_time
-                read_speed = (current_stats.read_bytes - last_stats.read_bytes) / elapsed_time
-                write_speed = (current_stats.write_bytes - last_stats.write_bytes) / elapsed_time
+                elapsed_time = max(current_time - last_ts, 1e-6)
+                # A counter wrap/reset (current < last) gives 0 for this sample
+                read_speed = max(0.0, (current_stats.read_bytes - last_stats.read_bytes) / elapsed_time)
+                write_speed = max(0.0, (current_stats.write_bytes - last_stats.write_bytes) / elapsed_time)
             else:
                 read_speed = 0
                 write_speed = 0
 
             # Update stats
             self.last_disk_stats[device_id] = current_stats
-            self.last_update_time = current_time
+            self.last_update_time[device_id] = current_time
 
             return {
-                "read_speed": read_speed,
-                "write_speed": write_speed,
+                "read_speed": read_speed,  # Bytes/sec
+                "write_speed": write_speed,  # Bytes/sec
                 "read_count": current_stats.read_count,
                 "write_count": current_stats.write_count,
             }
-        except Exception as e:
-            print(f"Error retrieving disk I/O metrics: {e}")
+        except (AttributeError, TypeError) as e:
+            # Unexpected counters object
+            logger.debug(f"Error retrieving disk I/O metrics: {e}")
             return None
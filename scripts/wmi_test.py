@@ -0,0 +1,25 @@
+"""List the disk drives seen by WMI (Windows only).
+
+Helper used to check the NVMe detection of the diskio plugin:
+python scripts/wmi_test.py
+"""
+
+import wmi
+
+
+def main():
+    # Initialize WMI interface
+    c = wmi.WMI()
+
+    print("Detected Drives:")
+    for disk in c.Win32_DiskDrive():
+        print(f"DeviceID: {disk.DeviceID}")
+        print(f"Model: {disk.Model}")
+        print(f"InterfaceType: {disk.InterfaceType}")
+        print(f"PNPDeviceID: {disk.PNPDeviceID}")
+        print(f"Size: {int(disk.Size) / (1024**3):.2f} GB" if disk.Size else "Size: N/A")
+        print("-" * 40)
+
+
+if __name__ == "__main__":
+    main()
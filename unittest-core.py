@@ -18,7 +18,7 @@ import unittest
 from glances import __version__
 from glances.events_list import GlancesEventsList
 from glances.filter import GlancesFilter, GlancesFilterList
-from glances.globals import LINUX, WINDOWS, string_value_to_float, subsample
+from glances.globals import LINUX, WINDOWS, string_value_to_float, subsample, ttl_cache
 from glances.main import GlancesMain
 from glances.outputs.glances_bars import Bar
 from glances.plugins.plugin.model import GlancesPluginModel
@@ -561,6 +561,130 @@ class TestGlances(unittest.TestCase):
         self.assertTrue(gfl.is_filtered({'name': 'snake is in the place', 'username': 'nicolargo'}))
         self.assertFalse(gfl.is_filtered({'name': 'snake is in the place', 'username': 'notme'}))
 
+    @unittest.skipIf(not LINUX, "/proc/diskstats is Linux only")
+    def test_021_diskio_proc_diskstats(self):
+        """Test the /proc/diskstats parser of the DISKIO plugin"""
+        print('INFO: [TEST_021] Test /proc/diskstats parser')
+        import psutil
+
+        from glances.plugins.diskio import _read_proc_diskstats
+
+        diskio = dict(_read_proc_diskstats())
+        self.assertEqual(set(diskio), set(psutil.disk_io_counters(perdisk=True)))
+        for counters in diskio.values():
+            self.assertGreaterEqual(counters.read_count, 0)
+            self.assertEqual(counters.read_bytes % 512, 0)
+            self.assertEqual(counters.write_bytes % 512, 0)
+
+    def test_022_nvme_metrics(self):
+        """Test the NVMe speeds computed by a reused NVMeMetrics instance"""
+        print('INFO: [TEST_022] Test NVMe metrics')
+        from glances.plugins.diskio import DiskIOCounters
+        from glances.plugins.nvme_metrics import NVMeMetrics
+
+        nvme_metrics = NVMeMetrics()
+        # First sample: no previous counters
+        metrics = nvme_metrics.get_disk_io_metrics('nvme0', {'nvme0': DiskIOCounters(1, 1, 0, 0)})
+        self.assertEqual(metrics['read_speed'], 0)
+        self.assertEqual(metrics['write_speed'], 0)
+        # Second sample: the previous counters are kept by the instance
+        time.sleep(0.1)
+        metrics = nvme_metrics.get_disk_io_metrics('nvme0', {'nvme0': DiskIOCounters(2, 2, 4096, 8192)})
+        self.assertEqual(metrics['read_count'], 2)
+        self.assertGreater(metrics['read_speed'], 0)
+        self.assertGreater(metrics['write_speed'], metrics['read_speed'])
+        # Counters reset: no negative speed
+        metrics = nvme_metrics.get_disk_io_metrics('nvme0', {'nvme0': DiskIOCounters(0, 0, 0, 0)})
+        self.assertEqual(metrics['read_speed'], 0)
+        self.assertEqual(metrics['write_speed'], 0)
+        # Unknown device
+        self.assertIsNone(nvme_metrics.get_disk_io_metrics('nvme1', {'nvme0': DiskIOCounters(0, 0, 0, 0)}))
+
+    def test_023_ttl_cache(self):
+        """Test ttl_cache decorator"""
+        print('INFO: [TEST_023] Test ttl_cache decorator')
+        calls = []
+
+        @ttl_cache(ttl=0.5)
+        def slow(value):
+            calls.append(value)
+            return value * 2
+
+        self.assertEqual(slow(1), 2)
+        self.assertEqual(slow(1), 2)
+        self.assertEqual(slow(2), 4)
+        self.assertEqual(calls, [1, 2])
+        time.sleep(0.6)
+        self.assertEqual(slow(1), 2)
+        self.assertEqual(calls, [1, 2, 1])
+        slow.cache_clear()
+        slow(2)
+        self.assertEqual(calls, [1, 2, 1, 2])
+
+    def test_024_smart_temperature(self):
+        """Test the temperature read in a SMART attributes table"""
+        print('INFO: [TEST_024] Test SMART temperature')
+        from glances.plugins.nvme_detection import smart_temperature
+
+        vendor_specific = [0] * 512
+        # First attribute: Power-On Hours (9)
+        vendor_specific[2] = 9
+        vendor_specific[7] = 100
+        # Third attribute: Temperature (194)
+        vendor_specific[2 + 2 * 12] = 194
+        vendor_specific[2 + 2 * 12 + 5] = 42
+        self.assertEqual(smart_temperature(vendor_specific), 42)
+        vendor_specific[2 + 2 * 12] = 0
+        self.assertIsNone(smart_temperature(vendor_specific))
+        self.assertIsNone(smart_temperature([]))
+
+    def test_025_match_pnp_device_id(self):
+        """Test the match between a root/wmi InstanceName and a PNPDeviceID"""
+        print('INFO: [TEST_025] Test PNPDeviceID match')
+        from glances.plugins.nvme_detection import _match_pnp_device_id
+
+        pnp_device_ids = ('SCSI\\DISK&VEN_NVME\\5&ABC&0&1', 'SCSI\\DISK&VEN_NVME\\5&ABC&0&10')
+        self.assertEqual(_match_pnp_device_id('SCSI\\DISK&VEN_NVME\\5&ABC&0&10_0', pnp_device_ids), pnp_device_ids[1])
+        self.assertEqual(_match_pnp_device_id('scsi\\disk&ven_nvme\\5&abc&0&1_0', pnp_device_ids), pnp_device_ids[0])
+        self.assertIsNone(_match_pnp_device_id('SCSI\\DISK&VEN_NVME\\5&ABC&0&2_0', pnp_device_ids))
+        self.assertIsNone(_match_pnp_device_id('SCSI\\DISK&VEN_NVME\\5&ABC&0&1', pnp_device_ids))
+
+    def test_026_diskio_nowrap(self):
+        """Test the counters wrap compensation of the DISKIO plugin"""
+        print('INFO: [TEST_026] Test diskio counters wrap compensation')
+        from psutil._common import wrap_numbers
+
+        from glances.plugins.diskio import DiskIOCounters
+
+        plugin = stats.get_plugin('diskio')
+        samples = [
+            (10, 10, 100, 100),
+            # Normal increase
+            (12, 11, 110, 120),
+            # A single counter goes down
+            (13, 5, 120, 130),
+            # Full reset
+            (0, 0, 0, 0),
+            (3, 4, 5, 6),
+        ]
+        expected = [
+            (10, 10, 100, 100),
+            (12, 11, 110, 120),
+            (13, 16, 120, 130),
+            (13, 16, 120, 130),
+            (16, 20, 125, 136),
+        ]
+        previous = (0, 0, 0, 0)
+        for sample, result in zip(samples, expected):
+            counters = plugin._nowrap({'test_nowrap': DiskIOCounters(*sample)})['test_nowrap']
+            self.assertEqual(tuple(counters), result)
+            # Same result as psutil.disk_io_counters(nowrap=True)
+            psutil_counters = wrap_numbers({'test_nowrap': DiskIOCounters(*sample)}, 'glances_test_nowrap')
+            self.assertEqual(tuple(psutil_counters['test_nowrap']), result)
+            # Monotonic
+            self.assertTrue(all(c >= p for c, p in zip(counters, previous)))
+            previous = counters
+
     def test_094_thresholds(self):
         """Test thresholds classes"""
         print('INFO: [TEST_094] Thresholds')